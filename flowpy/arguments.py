@@ -10,24 +10,54 @@ parser.add_argument("-o", "--output", help="Output file", default="stdout")
 parser.add_argument("-c", "--colour", action="store_true", help="Colour output")
 parser.add_argument("-d", "--debug", action="store_true", help="Debug mode")
 parser.add_argument("--diff", type=int, help="Diff context", default=2)
-args = parser.parse_args()
+# The defaults until `parse_args` is called, so that importing
+# flowpy does not parse the arguments of whatever imported it
+args = parser.parse_args([])
 
 MAIN_SCRIPT = "__global_script__"
 FLOWPY_PREFIX = "fp"
 
 
-class Format:
+class _ColourFormat:
     """
-    Class for formatting output
+    Class for formatting coloured output
     """
 
-    UNDERLINE = "\033[4m" if args.colour else ""
-    CYAN = "\033[96m" if args.colour else ""
-    BLUE = "\033[94m" if args.colour else ""
-    GREEN = "\033[92m" if args.colour else ""
-    YELLOW = "\033[93m" if args.colour else ""
-    RED = "\033[91m" if args.colour else ""
-    GREY = "\033[38;5;246m" if args.colour else ""
-    BOLD = "\033[1m" if args.colour else ""
-    END = "\033[0m" if args.colour else ""
-    ORANGE = "\033[38;5;208m" if args.colour else ""
+    UNDERLINE = "\033[4m"
+    CYAN = "\033[96m"
+    BLUE = "\033[94m"
+    GREEN = "\033[92m"
+    YELLOW = "\033[93m"
+    RED = "\033[91m"
+    GREY = "\033[38;5;246m"
+    BOLD = "\033[1m"
+    END = "\033[0m"
+    ORANGE = "\033[38;5;208m"
+
+
+class _PlainFormat:
+    """
+    Class for formatting output without colours
+    """
+
+    UNDERLINE = CYAN = BLUE = GREEN = YELLOW = RED = GREY = BOLD = END = ORANGE = ""
+
+
+class Format(_PlainFormat):
+    """
+    Class for formatting output, coloured once the arguments ask for it
+    """
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line arguments, or argv, into args
+    and sets up Format accordingly. Returns args.
+    Arguments left out are reset to their defaults.
+    """
+    vars(args).update(vars(parser.parse_args(argv)))
+    codes = _ColourFormat if args.colour else _PlainFormat
+    for name, code in vars(codes).items():
+        if name.isupper():
+            setattr(Format, name, code)
+    return args
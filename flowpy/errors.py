@@ -1,25 +1,51 @@
 import ast
+import sys
+from functools import lru_cache
 
-from .arguments import Format
+from .arguments import _ColourFormat, _PlainFormat, args
 from .state import State
 
 
+@lru_cache(maxsize=None)
+def _templates(colour: bool) -> dict:
+    """
+    The static parts of flow variables and flow errors as printed,
+    formatted once for plain and once for coloured output.
+    """
+    codes = _ColourFormat if colour else _PlainFormat
+    line = f"\n\t{codes.YELLOW + codes.UNDERLINE}@ line {{}}{codes.END}: \t{codes.GREY}{{}}{codes.END}"
+    pc = f"\n\t{codes.BOLD}PC:{codes.END}     \t{codes.GREY}{{}}{codes.END}"
+    used = f"\n\t{codes.BOLD}Used:{codes.END}   \t{{}}"
+    target = f"\n\t{codes.BOLD}Target:{codes.END} \t{{}}"
+    return {
+        "flowvar": f"{codes.BOLD}{{}}{codes.END} : {codes.GREY}{{}}{codes.END}",
+        "implicit_header": f"{codes.BOLD+codes.ORANGE}Implicit Flow Error{codes.END}",
+        "explicit_header": f"{codes.BOLD+codes.ORANGE}Explicit Flow Error{codes.END}",
+        "implicit_body": line + pc + target,
+        "explicit_body": line + used + target,
+    }
+
+
 class FlowVar:
     """
     FlowVar is a wrapper class for a variable name and its labels.
     """
 
+    __slots__ = ("name", "labels")
+
     def __init__(self, name, labels):
-        self.name = name
+        self.name = sys.intern(name)
         self.labels = labels
 
     def __str__(self):
-        labs = str(self.labels).replace("'", "")
         if self.labels is None:
             labs = "untracked"
         elif len(self.labels) == 0:
             labs = "()"
-        return f"{Format.BOLD}{self.name}{Format.END} : {Format.GREY}{labs}{Format.END}"
+        else:
+            # Labels may be frozen, print them like any set
+            labs = str(set(self.labels)).replace("'", "")
+        return _templates(args.colour)["flowvar"].format(self.name, labs)
 
 
 # Purpose: Defines the base class for all flow faults.
@@ -64,15 +90,13 @@ class ImplicitFlowError(FlowError):
         super().__init__(node, state, var_to, info)
 
     def __str__(self) -> str:
-        message = [
-            f"{Format.BOLD+Format.ORANGE}Implicit Flow Error{Format.END}",
-            f"{Format.YELLOW + Format.UNDERLINE}@ line {self.line}{Format.END}: \t{Format.GREY}{self.get_code()}{Format.END}",
-            f"{Format.BOLD}PC:{Format.END}     \t{Format.GREY}{self.state.get_pc()}{Format.END}",
-            f"{Format.BOLD}Target:{Format.END} \t{self.var_to}",
-        ]
+        templates = _templates(args.colour)
+        header = templates["implicit_header"]
         if self.info:
-            message[0] += f": {self.info}"
-        return "\n\t".join(message)
+            header = f"{header}: {self.info}"
+        return header + templates["implicit_body"].format(
+            self.line, self.get_code(), self.state.get_pc(), self.var_to
+        )
 
 
 class ExplicitFlowError(FlowError):
@@ -92,14 +116,12 @@ class ExplicitFlowError(FlowError):
 
     def __str__(self) -> str:
         used = []
-        for var, labels in self.state.get_used(1).items():
+        for var, labels in self.state.get_used_vars().items():
             used.append(str(FlowVar(var, labels)))
-        message = [
-            f"{Format.BOLD+Format.ORANGE}Explicit Flow Error{Format.END}",
-            f"{Format.YELLOW + Format.UNDERLINE}@ line {self.line}{Format.END}: \t{Format.GREY}{self.get_code()}{Format.END}",
-            f"{Format.BOLD}Used:{Format.END}   \t{'   '.join(used)}",
-            f"{Format.BOLD}Target:{Format.END} \t{self.var_to}",
-        ]
+        templates = _templates(args.colour)
+        header = templates["explicit_header"]
         if self.info:
-            message[0] += f": {self.info}"
-        return "\n\t".join(message)
+            header = f"{header}: {self.info}"
+        return header + templates["explicit_body"].format(
+            self.line, self.get_code(), "   ".join(used), self.var_to
+        )
@@ -1,19 +1,38 @@
 import ast
 import sys
-from abc import ABC, abstractmethod
+from itertools import chain
 from typing import Dict, List, Set, Tuple
 
 from .arguments import MAIN_SCRIPT, args
 from .errors import ExplicitFlowError, FlowError, FlowVar, ImplicitFlowError
 from .state import State
 
+# Statements that read no labelled values and assign nothing, skipped without
+# creating an evaluator for them.
+_INERT_TYPES = frozenset(
+    (ast.Import, ast.ImportFrom, ast.Pass, ast.Break, ast.Continue)
+)
+
+# Nodes holding their elements in `elts`,
+# assigned element by element in `AssignEvaluator`.
+_SEQUENCE_TYPES = frozenset((ast.Tuple, ast.List, ast.Set))
+
+# Format of the messages printed by `Evaluator.warn`,
+# only coloured when stderr is a terminal.
+if sys.stderr.isatty():
+    _WARNING = "\033[33;1mWARNING (line {}):\033[0m \033[;1m{}\033[0m\n"
+else:
+    _WARNING = "WARNING (line {}): {}\n"
+
 
 # TODO: RETURN labels AND warnings
-class Evaluator(ABC):
+class Evaluator:
     """
-    Abstract class for all evaluators to inherit from.
+    Base class for all evaluators to inherit from.
     """
 
+    __slots__ = ("node", "state", "function_states")
+
     node: ast.AST
     state: State
     function_states: Dict[str, State]
@@ -29,37 +48,9 @@ class Evaluator(ABC):
         """
         Depending on type of node, return the appropriate subclass
         """
-        match node.__class__:
-            case ast.If:
-                return IfEvaluator(node, state, function_states)
-            case ast.Assign:
-                return AssignEvaluator(node, state, function_states)
-            case ast.Expr:
-                return ExprEvaluator(node, state, function_states)
-            case ast.Call:
-                return CallEvaluator(node, state, function_states)
-            case ast.FunctionDef:
-                return FunctionDefEvaluator(node, state, function_states)
-            case ast.Module:
-                return ModuleEvaluator(node, state, function_states)
-            case ast.While:
-                return WhileEvaluator(node, state, function_states)
-            case ast.Pass:
-                return PassEvaluator(node, state, function_states)
-            case ast.IfExp:
-                return IfExpEvaluator(node, state, function_states)
-            case ast.Compare:
-                return CompareEvaluator(node, state, function_states)
-            case ast.Name:
-                return NameEvaluator(node, state, function_states)
-            case ast.Tuple:
-                return TupleEvaluator(node, state, function_states)
-            case ast.Constant:
-                return ConstantEvaluator(node, state, function_states)
-            case ast.For:
-                return ForEvaluator(node, state, function_states)
-            case _:
-                return UnimplementedEvaluator(node, state, function_states)
+        return _EVALUATORS.get(type(node), UnimplementedEvaluator)(
+            node, state, function_states
+        )
 
     @staticmethod
     # Print a warning message
@@ -68,21 +59,29 @@ class Evaluator(ABC):
         Print a warning message
         """
         if args.verbose:
-            print(
-                "\033[33;1m" + f"WARNING (line {line}):" + "\033[0m",
-                f"\033[;1m{msg}\033[0m",
-                file=sys.stderr,
-            )
+            sys.stderr.write(_WARNING.format(line, msg))
 
-    @abstractmethod
-    def evaluate(self) -> bool:
+    def evaluate_body(self, body) -> None:
+        """
+        Evaluate a sequence of statements, each in a copy of the state.
+        Inert statements are skipped.
+        """
+        state = self.state
+        function_states = self.function_states
+        for nd in body:
+            if type(nd) in _INERT_TYPES:
+                continue
+            _EVALUATORS.get(type(nd), UnimplementedEvaluator)(
+                nd, state.copy(), function_states
+            ).evaluate()
+
+    def evaluate(self) -> State:
         """
         Evaluate the contents of a node.
         PC must be saved and reset at beginning and end respectively.
-        Always returns (warnings, labels of variables in PC)
+        Must be implemented by every subclass, returning the resulting state.
         """
-        expression_OK = []
-        return expression_OK, dict()
+        raise NotImplementedError
 
 
 class UnimplementedEvaluator(Evaluator):
@@ -93,13 +92,12 @@ class UnimplementedEvaluator(Evaluator):
     AttributeErrors from trying to check an unimplemented node.
     """
 
+    __slots__ = ()
+
     node: ast.AST
     state: State
     function_states: Dict[str, State]
 
-    def __init__(self, node: ast.AST, state: State, function_states: Dict[str, State]):
-        super().__init__(node, state, function_states)
-
     def evaluate(self) -> List[FlowError]:
         # TODO: Make verbosable
         Evaluator.warn(
@@ -114,37 +112,41 @@ class NameEvaluator(Evaluator):
     Crucial for error reporting.
     """
 
-    def __init__(self, node, state, function_states):
-        super().__init__(node, state, function_states)
+    __slots__ = ()
 
     def evaluate(self) -> State:
         """
         Evaluate a name.
         """
-        curr_labels = self.state.get_labels(self.node.id)
-        if type(self.node.ctx) == ast.Store:
+        node = self.node
+        ctx = type(node.ctx)
+        if ctx is ast.Store:
+            curr_labels = self.state.get_labels(node.id)
             # Report errors if the variable is missing any labels in PC
-            used_labels = self.state.get_used(0)
-            if not used_labels.issubset(curr_labels):
+            used_labels = self.state.get_used_labels()
+            pc = self.state.get_pc()
+            missing = used_labels - curr_labels
+            if missing:
                 self.state.error(
                     ExplicitFlowError(
-                        self.node,
+                        node,
                         self.state,
-                        FlowVar(self.node.id, curr_labels),
-                        f"Target missing used labels {used_labels - curr_labels}",
+                        FlowVar(node.id, curr_labels),
+                        f"Target missing used labels {missing}",
                     )
                 )
-            if not self.state.get_pc().issubset(curr_labels):
+            missing = pc - curr_labels
+            if missing:
                 self.state.error(
                     ImplicitFlowError(
-                        self.node,
+                        node,
                         self.state,
-                        FlowVar(self.node.id, curr_labels),
-                        f"Target missing PC labels {self.state.get_pc() - curr_labels}",
+                        FlowVar(node.id, curr_labels),
+                        f"Target missing PC labels {missing}",
                     )
                 )
-        elif type(self.node.ctx) == ast.Load:
-            self.state.set_used(self.node.id)
+        elif ctx is ast.Load:
+            self.state.set_used(node.id)
         return self.state
 
 
@@ -153,15 +155,18 @@ class TupleEvaluator(Evaluator):
     Evaluate a tuple.
     """
 
-    def __init__(self, node, state, function_states):
-        super().__init__(node, state, function_states)
+    __slots__ = ()
 
     def evaluate(self) -> bool:
+        state = self.state
+        function_states = self.function_states
         for nd in self.node.elts:
-            evaluator = Evaluator.from_AST(nd, self.state.copy(), self.function_states)
-            state = evaluator.evaluate()
-            self.state.update_used(state)
-        return self.state
+            # Constants use nothing, so there is nothing to add
+            if type(nd) is ast.Constant:
+                continue
+            evaluator = Evaluator.from_AST(nd, state.copy(), function_states)
+            state.update_used(evaluator.evaluate())
+        return state
 
 
 class ConstantEvaluator(Evaluator):
@@ -169,8 +174,7 @@ class ConstantEvaluator(Evaluator):
     Evaluate a constant.
     """
 
-    def __init__(self, node, state, function_states):
-        super().__init__(node, state, function_states)
+    __slots__ = ()
 
     def evaluate(self) -> bool:
         return self.state
@@ -181,6 +185,8 @@ class FunctionDefEvaluator(Evaluator):
     Evaluate a function.
     """
 
+    __slots__ = ()
+
     node: ast.FunctionDef
     state: State
     function_states: Dict[str, State]
@@ -195,9 +201,7 @@ class FunctionDefEvaluator(Evaluator):
 
     def evaluate(self) -> List[FlowError]:
         # for all nodes in the function
-        for nd in self.node.body:
-            evaluator = Evaluator.from_AST(nd, self.state.copy(), self.function_states)
-            evaluator.evaluate()
+        self.evaluate_body(self.node.body)
         return self.state
 
 
@@ -206,14 +210,13 @@ class IfExpEvaluator(Evaluator):
     If expression evaluator.
     """
 
-    def __init__(self, node, state, function_states):
-        super().__init__(node, state, function_states)
+    __slots__ = ()
 
     def evaluate(self) -> List[FlowError]:
         state = Evaluator.from_AST(
             self.node.test, self.state.copy(), self.function_states
         ).evaluate()
-        used = state.get_used()
+        used = state.get_used_labels()
         self.state.set_used(used)
         self.state.update_pc(used)
         Evaluator.from_AST(
@@ -230,31 +233,29 @@ class CompareEvaluator(Evaluator):
     Evaluate a comparison.
     """
 
-    def __init__(self, node, state, function_states):
-        super().__init__(node, state, function_states)
+    __slots__ = ()
 
     def evaluate(self) -> Tuple[List[FlowError], Set[str]]:
         # Check the LHS plus all the other variables/elements in the statement
-        items = list(
-            self.node.comparators
-        )  # Not the LHS (list as we may have a == b == c or smth)
-        items.append(self.node.left)  # The LHS
-        for item in items:
-            state = Evaluator.from_AST(
-                item, self.state.copy(), self.function_states
-            ).evaluate()
-            self.state.update_used(state)
-        return self.state
+        # The comparators may be several, as in a == b == c, then the LHS
+        state = self.state
+        function_states = self.function_states
+        for item in (*self.node.comparators, self.node.left):
+            # Constants use nothing, so there is nothing to add
+            if type(item) is ast.Constant:
+                continue
+            evaluator = Evaluator.from_AST(item, state.copy(), function_states)
+            state.update_used(evaluator.evaluate())
+        return state
 
 
 class IfEvaluator(Evaluator):
+    __slots__ = ()
+
     node: ast.If
     state: State
     function_states: Dict[str, State]
 
-    def __init__(self, node: ast.If, state: State, function_states: Dict[str, State]):
-        super().__init__(node, state, function_states)
-
     # If statements have a "test" (the conditional) which holds one node.
     # By looking at the Python grammar, the type this node may have is not that
     # restricted, but we should probably just assume we have a `name` or `compare`
@@ -266,53 +267,41 @@ class IfEvaluator(Evaluator):
         state = Evaluator.from_AST(
             self.node.test, self.state.copy(), self.function_states
         ).evaluate()
-        self.state.update_pc(state.get_used())
+        self.state.update_pc(state.get_used_labels())
         # `elif`s are represented as an `if` inside the `orelse` list.
-        for nd in self.node.body + self.node.orelse:
-            Evaluator.from_AST(nd, self.state.copy(), self.function_states).evaluate()
+        self.evaluate_body(chain(self.node.body, self.node.orelse))
 
         return self.state
 
 
 class AssignEvaluator(Evaluator):
+    __slots__ = ()
+
     node: ast.Assign
     state: State
     function_states: Dict[str, State]
 
-    def __init__(
-        self, node: ast.Assign, state: State, function_states: Dict[str, State]
-    ):
-        super().__init__(node, state, function_states)
-
     def evaluate(self) -> bool:
         # Only support assignment of simple variables so far
         # (no lists, dicts etc. on RHS)
-        states = []
-        if hasattr(self.node.value, "elts"):
-            # iterable values
-            for elt in self.node.value.elts:
-                states.append(
-                    Evaluator.from_AST(
-                        elt, self.state.copy(), self.function_states
-                    ).evaluate()
-                )
-        else:
-            states.append(
-                Evaluator.from_AST(
-                    self.node.value, self.state.copy(), self.function_states
-                ).evaluate()
-            )
+        # Iterable values are evaluated element by element,
+        # so that they can be matched against iterable targets
+        rhs = self.node.value
+        function_states = self.function_states
+        values = rhs.elts if type(rhs) in _SEQUENCE_TYPES else (rhs,)
+        states = [
+            Evaluator.from_AST(value, self.state.copy(), function_states).evaluate()
+            for value in values
+        ]
         for tgt in self.node.targets:
-            if hasattr(tgt, "elts"):
-                for i in range(len(states)):
-                    Evaluator.from_AST(
-                        tgt.elts[i], states[i].copy(), self.function_states
-                    ).evaluate()
+            if type(tgt) in _SEQUENCE_TYPES:
+                for elt, state in zip(tgt.elts, states):
+                    Evaluator.from_AST(elt, state.copy(), function_states).evaluate()
             else:
                 state = self.state.copy()
                 for s in states:
                     state.update_used(s)
-                Evaluator.from_AST(tgt, state, self.function_states).evaluate()
+                Evaluator.from_AST(tgt, state, function_states).evaluate()
         # No "invalid" assignments have occurred
         return self.state
 
@@ -328,18 +317,18 @@ class ExprEvaluator(Evaluator):
     side effects, such as `print()`.
     """
 
+    __slots__ = ()
+
     node: ast.Expr
     state: State
     function_states: Dict[str, State]
 
-    def __init__(self, node: ast.Expr, state: State, function_states: Dict[str, State]):
-        super().__init__(node, state, function_states)
-
     # Since an expression acts as a wrapper, we just defer
-    # IFC to the wrapped node.
+    # IFC to the wrapped node. The state is passed on without a copy,
+    # since the caller already gave this evaluator a copy of its own.
     def evaluate(self) -> List[FlowError]:
         evaluator = Evaluator.from_AST(
-            self.node.value, self.state.copy(), self.function_states
+            self.node.value, self.state, self.function_states
         )
         return evaluator.evaluate()
 
@@ -355,44 +344,45 @@ class CallEvaluator(Evaluator):
     of type ast.Name). Any others will print an error message.
     """
 
+    __slots__ = ()
+
     node: ast.Call
     state: State
     function_states: Dict[str, State]
 
-    def __init__(self, node: ast.Call, state: State, function_states: Dict[str, State]):
-        super().__init__(node, state, function_states)
-
     def evaluate(self) -> List[FlowError]:
-        used = self.state.get_used()
+        used = self.state.get_used_labels()
         state = Evaluator.from_AST(
             self.node.func, self.state.copy(), self.function_states
         ).evaluate()
         self.state.update_pc(state)
-        if self.state.get_pc():
+        pc = self.state.get_pc()
+        if pc:
+            # Only named functions are read, once there is an error to report
+            func = self.node.func.id
+            func_labels = self.state.get_labels(func)
             self.state.error(
                 ImplicitFlowError(
                     self.node,
                     self.state,
-                    FlowVar(
-                        self.node.func.id, self.state.get_labels(self.node.func.id)
-                    ),
-                    f"Untracked function '{self.node.func.id}' called while PC has labels {self.state.get_pc()}",
+                    FlowVar(func, func_labels),
+                    f"Untracked function '{func}' called while PC has labels {pc}",
                 )
             )
+        function_states = self.function_states
         for arg in self.node.args:
-            state = Evaluator.from_AST(
-                arg, self.state.copy(), self.function_states
-            ).evaluate()
-            self.state.update_used(state)
-        if self.state.get_used() - used:
+            evaluator = Evaluator.from_AST(arg, self.state.copy(), function_states)
+            self.state.update_used(evaluator.evaluate())
+        classified = self.state.get_used_labels() - used
+        if classified:
+            func = self.node.func.id
+            func_labels = self.state.get_labels(func)
             self.state.error(
                 ExplicitFlowError(
                     self.node,
                     self.state,
-                    FlowVar(
-                        self.node.func.id, self.state.get_labels(self.node.func.id)
-                    ),
-                    f"Untracked function '{self.node.func.id}' called with classified arguments {self.state.get_used() - used}",
+                    FlowVar(func, func_labels),
+                    f"Untracked function '{func}' called with classified arguments {classified}",
                 )
             )
         return self.state
@@ -403,16 +393,14 @@ class ForEvaluator(Evaluator):
     Evaluate a for loop.
     """
 
-    def __init__(self, node, state, function_states):
-        super().__init__(node, state, function_states)
+    __slots__ = ()
 
     def evaluate(self) -> bool:
         state = Evaluator.from_AST(
             self.node.iter, self.state.copy(), self.function_states
         ).evaluate()
-        self.state.update_pc(state.get_used())
-        for nd in self.node.body:
-            Evaluator.from_AST(nd, self.state.copy(), self.function_states).evaluate()
+        self.state.update_pc(state.get_used_labels())
+        self.evaluate_body(self.node.body)
         return self.state
 
 
@@ -421,17 +409,14 @@ class WhileEvaluator(Evaluator):
     Evaluate a while loop.
     """
 
-    def __init__(self, node, state, function_states):
-        super().__init__(node, state, function_states)
+    __slots__ = ()
 
     def evaluate(self) -> bool:
         state = Evaluator.from_AST(
             self.node.test, self.state.copy(), self.function_states
         ).evaluate()
-        self.state.update_pc(state.get_used())
-        for nd in self.node.body:
-            evaluator = Evaluator.from_AST(nd, self.state.copy(), self.function_states)
-            state = evaluator.evaluate()
+        self.state.update_pc(state.get_used_labels())
+        self.evaluate_body(self.node.body)
         return self.state
 
 
@@ -440,8 +425,7 @@ class PassEvaluator(Evaluator):
     Evaluate a pass statement.
     """
 
-    def __init__(self, node, state, function_states):
-        super().__init__(node, state, function_states)
+    __slots__ = ()
 
     def evaluate(self) -> List[FlowError]:
         return self.state
@@ -453,6 +437,8 @@ class ModuleEvaluator(Evaluator):
     "regular" python files.
     """
 
+    __slots__ = ()
+
     node: ast.Module
     state: State
     function_states: Dict[str, State]
@@ -465,7 +451,25 @@ class ModuleEvaluator(Evaluator):
             self.state.combine(self.function_states[MAIN_SCRIPT])
 
     def evaluate(self) -> bool:
-        for nd in self.node.body:
-            evaluator = Evaluator.from_AST(nd, self.state.copy(), self.function_states)
-            evaluator.evaluate()
+        self.evaluate_body(self.node.body)
         return self.state
+
+
+# Evaluator to use for each type of node, see `Evaluator.from_AST`.
+# Any node type not listed here gets an `UnimplementedEvaluator`.
+_EVALUATORS = {
+    ast.If: IfEvaluator,
+    ast.Assign: AssignEvaluator,
+    ast.Expr: ExprEvaluator,
+    ast.Call: CallEvaluator,
+    ast.FunctionDef: FunctionDefEvaluator,
+    ast.Module: ModuleEvaluator,
+    ast.While: WhileEvaluator,
+    ast.Pass: PassEvaluator,
+    ast.IfExp: IfExpEvaluator,
+    ast.Compare: CompareEvaluator,
+    ast.Name: NameEvaluator,
+    ast.Tuple: TupleEvaluator,
+    ast.Constant: ConstantEvaluator,
+    ast.For: ForEvaluator,
+}
@@ -1,19 +1,46 @@
 #!/usr/bin/python3
 import ast
+import logging
 import os
+import re
 import subprocess
 import tokenize
-from io import BytesIO, IOBase
+from functools import lru_cache
+from io import IOBase, StringIO
+from itertools import count
 from pathlib import Path
 from sys import stderr, stdin, stdout
 from typing import Dict
 
-from .arguments import FLOWPY_PREFIX, MAIN_SCRIPT, Format, args
-from .evaluators import Evaluator
+from .arguments import FLOWPY_PREFIX, MAIN_SCRIPT, Format, args, parse_args
 from .state import State
 
 # TODO: Print to sink instead of stdout
 
+# Matches anything that could be a FlowPy comment. This may also match inside
+# strings, so it is only used to tell when there are no FlowPy comments at all.
+_FLOWPY_COMMENT = re.compile(r"#\s*" + re.escape(FLOWPY_PREFIX))
+
+# Numbers the sources that are given without a name
+_UNNAMED = count()
+
+# Tokens that are of no interest when looking for FlowPy comments
+_SKIPPED_TOKENS = frozenset(
+    (tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT)
+)
+
+
+@lru_cache(maxsize=1)
+def _bat_available() -> bool:
+    """
+    Whether bat can be run to pretty print sources, checked only once
+    """
+    try:
+        subprocess.call(["bat", "-V"], stdout=subprocess.DEVNULL)
+        return True
+    except:
+        return False
+
 
 class FlowPy:
     """
@@ -35,13 +62,16 @@ class FlowPy:
         encoding: str
         global_state: State
         functions: Dict[str, State]
+        tree: ast.Module
 
         def get_lines(self, line, diff=1) -> str:
             """
             Returns the lines of code surrounding the given line
             with a diff of diff.
             """
-            lines = self.source.splitlines()
+            if self._lines is None:
+                self._lines = self.source.splitlines()
+            lines = self._lines
             botdelta = line - diff - 1
             topdelta = line + diff - len(lines)
             add_to_bot = 0 if topdelta < 0 else topdelta
@@ -60,54 +90,64 @@ class FlowPy:
             self.functions: Dict[str, State] = {}
             self.global_state = State()
             self.is_file = is_file
+            # Split into lines when first needed to show code context
+            self._lines = None
+            # Parsed once and reused by every run
+            self.tree = ast.parse(source, filename=name or "<unknown>")
 
         def parse(self) -> None:
             """
             Parses the source code and extracts the comments
             rules for each function.
             """
-            tokens = tokenize.tokenize(
-                BytesIO(self.source.encode(self.encoding)).readline
-            )
-            # We don't really care about these
-            to_skip = [tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT]
+            # Without FlowPy comments there are no rules to collect,
+            # so there is no need to run the tokenizer at all
+            if _FLOWPY_COMMENT.search(self.source) is None:
+                self.functions[MAIN_SCRIPT] = self.global_state
+                return
 
-            expecting_def = False
+            # The source is already decoded, so tokenize it as text
+            # rather than encoding a second, binary copy of it
+            tokens = tokenize.generate_tokens(StringIO(self.source).readline)
+            to_skip = _SKIPPED_TOKENS
+            comment_type = tokenize.COMMENT
+
+            # The rules of the comments before the next statement
+            comments = []
             upcoming_function_name = False
 
-            state = State()
             for token in tokens:
                 if token.type in to_skip:
                     continue
-                if token.type == tokenize.COMMENT:
+                if token.type == comment_type:
                     comment = token.string[1:].lstrip()
                     if comment.startswith(FLOWPY_PREFIX):
-                        expecting_def = True
-                        state.add_rules(
+                        comments.append(
                             comment.removeprefix(FLOWPY_PREFIX)
                         )  # Strip the prefix
                 # Run only if we're supposed to evaluate the next function and are out of comments.
-                elif expecting_def:
+                elif comments:
                     if token.string == "def":
                         upcoming_function_name = True
-                    elif upcoming_function_name:
-                        # Bind the state to that function and create a new state for the next
+                        continue
+                    # The rules of all the comments are added at once
+                    state = State()
+                    state.add_rules(".".join(comments))
+                    comments = []
+                    if upcoming_function_name:
+                        # Bind the state to that function
                         self.functions[token.string] = state
-                        state = State()
                         upcoming_function_name = False
-                        expecting_def = False
                     else:
-                        expecting_def = False
                         self.global_state.combine(state)
-                        state = State()
 
             self.functions[MAIN_SCRIPT] = self.global_state
 
-    def get_source(self) -> Source:
+    def get_source(self) -> str:
         """
-        Returns the source code as a Source object
+        Returns the source code of all sources
         """
-        return "".join(map(str, self.sources))
+        return "".join(source.source for source in self.sources)
 
     def get_states(self) -> str:
         res = []
@@ -125,38 +165,39 @@ class FlowPy:
         self.encoding = encoding
         sources = [sources] if type(sources) != list else sources
         self.sources = []
-        name = ""
-        is_file = False
         for source in sources:
+            # Each source gets its own name, or a number if it has none
+            name = ""
+            is_file = False
             if source == stdin:
                 name = "stdin"
             source_str = ""
             if isinstance(source, IOBase):
                 source_str = source.read()
             elif isinstance(source, str):
-                path = Path(source)
-                if path.exists():
+                # A string naming no file is source code, any other
+                # error reading the file is reported as it is
+                if os.path.exists(source):
+                    # Decoded in one go rather than through a text reader,
+                    # so its line endings are translated here instead
+                    with open(source, "rb") as file:
+                        source_str = file.read().decode(self.encoding)
+                    source_str = source_str.replace("\r\n", "\n").replace("\r", "\n")
                     is_file = True
-                    name = path.name
-                    source_str = open(path, encoding=self.encoding).read()
+                    name = Path(source).name
                 else:
                     source_str = source
             else:
                 print("Error: Source must be a file or a string", file=stderr)
                 exit(1)
             if not name:
-                name = 'unnamed-' + os.urandom(8).hex()
+                name = f"unnamed-{next(_UNNAMED)}"
             self.sources.append(
                 self.Source(source_str, encoding=self.encoding, name=name, is_file=is_file)
             )
 
             if args.verbose:
-                bat_available = False
-                try:
-                    subprocess.call(["bat", "-V"], stdout=subprocess.DEVNULL)
-                    bat_available = is_file
-                except:
-                    pass
+                bat_available = is_file and _bat_available()
 
                 print(
                     f"\n{Format.GREEN}----- {Format.BOLD}"
@@ -172,7 +213,7 @@ class FlowPy:
 
                 else:
                     print(
-                        f"{self.get_source()}"
+                        f"{source_str}"
                         + "\n"
                     )
                 print(f"{Format.GREEN}----- end of source{Format.END} {Format.GREEN} -----{Format.END}")
@@ -190,27 +231,30 @@ class FlowPy:
         Runs the program and evaluates the functions.
         Evaluates the code based on the FlowPy comments.
         """
+        # Only running needs the evaluators, so import them here
+        from .evaluators import Evaluator
+
         result = []
         for source in self.sources:
-            prog = ast.parse(str(source))
-            main_evaluator = Evaluator.from_AST(prog, State(), source.functions)
+            main_evaluator = Evaluator.from_AST(
+                source.tree, State(), source.functions
+            )
             state = main_evaluator.evaluate()
             warnings = state.get_warnings()
             print(f"{Format.CYAN}...analysing '{source.name}'...{Format.END}")
             if len(warnings) > 0:
-                print(
-                    f"\n{Format.RED + Format.UNDERLINE + Format.BOLD}FlowError(s) detected!{Format.END}"
-                )
-                print(
-                    f"{len(warnings)} warnings from source '{Format.UNDERLINE+Format.RED}{source.name}{Format.END}':"
-                )
+                # Collect the whole report and print it at once
+                output = [
+                    f"\n{Format.RED + Format.UNDERLINE + Format.BOLD}FlowError(s) detected!{Format.END}",
+                    f"{len(warnings)} warnings from source '{Format.UNDERLINE+Format.RED}{source.name}{Format.END}':",
+                ]
                 for warning in warnings:
-                    print()
-                    print(warning)
+                    output.append("")
+                    output.append(str(warning))
                     # print lines of code
                     if args.verbose:
-                        print()
-                        print(
+                        output.append("")
+                        output.append(
                             f"{Format.GREY + Format.BOLD}Code context:{Format.END}"
                         )
                         diff = args.diff
@@ -224,9 +268,10 @@ class FlowPy:
                                 colour = Format.RED+Format.BOLD
                             else:
                                 colour = Format.GREY
-                            print(f"{Format.GREY}{bottom+i+1}{' '*(max-len(str(bottom+i+1)))}  {colour}{line}{Format.END}")
-                        print()
+                            output.append(f"{Format.GREY}{bottom+i+1}{' '*(max-len(str(bottom+i+1)))}  {colour}{line}{Format.END}")
+                        output.append("")
                     result.append(warning)
+                print("\n".join(output))
             else:
                 print(
                     f"{Format.GREEN + Format.BOLD}No FlowErrors detected!{Format.END}"
@@ -235,6 +280,9 @@ class FlowPy:
 
 
 def main():
+    parse_args()
+    if args.debug:
+        logging.basicConfig(level=logging.DEBUG)
     print("~~~ FlowPy v0.1 ~~~")
     if args.verbose:
         print("\n <><< Verbose mode enabled >><> \n")
@@ -2,8 +2,56 @@
     This file contains the State class, which is used to keep track of the
     current state of variables.
 """
+import logging
 import re
-from copy import deepcopy
+import sys
+from functools import lru_cache
+
+_log = logging.getLogger(__name__)
+
+# The variable name, or wildcard pattern, a rule applies to
+_RULE_NAME = re.compile(r"[a-zA-Z0-9_\*]+")
+
+# The labels of variables without any, shared by all of them
+_NO_LABELS = frozenset()
+
+
+@lru_cache(maxsize=4096)
+def _compile_rule(restr: str) -> re.Pattern:
+    """
+    Compiles the pattern of a rule, matched against whole variable names
+    so that it needs no anchors. Shared by the rules of all states.
+    """
+    return re.compile(restr.replace("*", ".*"))
+
+
+@lru_cache(maxsize=None)
+def _parse_rules(comment: str) -> tuple:
+    """
+    Parses a FlowPy comment, see `State.add_rules`.
+    Returns the variable name or pattern and the labels of each rule,
+    cached as the same comments tend to be repeated throughout a program.
+    """
+    parsed = []
+    for rule in comment.strip().split("."):
+        if not rule:
+            continue
+        first, sep, second = rule.partition(":")
+        if not sep or ":" in second:
+            _log.debug("skipping rule %r: expected a single ':'", rule)
+            continue
+        match = _RULE_NAME.search(first)
+        if match is None:
+            _log.debug("skipping rule %r: no variable name", rule)
+            continue
+        regex = sys.intern(match.group())
+        # Labels are interned, as the same few labels are compared
+        # over and over again during evaluation
+        labels = [label.strip() for label in second.split(",")]
+        labels = [sys.intern(label) for label in labels if label]
+        if labels:
+            parsed.append((regex, tuple(l for l in labels if l != "()")))
+    return tuple(parsed)
 
 
 class State:
@@ -12,24 +60,64 @@ class State:
     A state belongs to a named scope (namespace)
     """
 
+    __slots__ = (
+        "__rules",
+        "__shared_rules",
+        "__wildcards",
+        "__leading_wildcards",
+        "__labels",
+        "__pc",
+        "__used",
+        "__warnings",
+    )
+
     class __Rule:
         """
         The Rule class is used to store rules.
         Each rule has a regex and a set of labels.
         """
 
+        __slots__ = ("regex", "pattern", "literal", "affixes", "labels")
+
         def __str__(self) -> str:
-            return f"Rule {self.regex} -> {self.labels}"
+            return f"Rule {self.regex} -> {set(self.labels)}"
 
         def __init__(self, restr, labels):
             self.regex = "^" + restr.replace("*", ".*") + "$"
-            self.labels = set(labels)
+            self.pattern = _compile_rule(restr)
+            # Rules without wildcards name exactly one variable
+            self.literal = None if "*" in restr else restr
+            # Rules with one wildcard, such as a*, *b or a*b, are checked
+            # by their prefix and suffix
+            prefix, _, suffix = restr.partition("*")
+            self.affixes = (prefix, suffix) if restr.count("*") == 1 else None
+            # Frozen, as rules are shared and never changed
+            self.labels = frozenset(labels)
 
-        def add(self, labels):
-            self.labels.update(labels)
+        def with_labels(self, labels):
+            """
+            Returns a copy of the rule with the labels added.
+            Rules are shared between states, so they are never changed.
+            """
+            rule = object.__new__(type(self))
+            rule.regex = self.regex
+            rule.pattern = self.pattern
+            rule.literal = self.literal
+            rule.affixes = self.affixes
+            rule.labels = self.labels.union(labels)
+            return rule
 
         def applies_to(self, value):
-            return bool(re.search(self.regex, value))
+            if self.literal is not None:
+                return value == self.literal
+            if self.affixes is not None:
+                prefix, suffix = self.affixes
+                return (
+                    len(value) >= len(prefix) + len(suffix)
+                    and value.startswith(prefix)
+                    and value.endswith(suffix)
+                )
+            return self.pattern.fullmatch(value) is not None
 
     def combine(self, other) -> None:
         """
@@ -37,21 +125,60 @@ class State:
         i.e. updates the PC and adds all missing labels
         """
         self.__pc.update(other.__pc)
+        self.__own_rules()
+        rules = self.__rules
         for regex, rule in other.__rules.items():
-            if regex not in self.__rules:
-                self.__rules[regex] = rule
+            existing = rules.get(regex)
+            if existing is None:
+                rules[regex] = rule
             else:
-                self.__rules[regex].add(rule.labels)
+                rules[regex] = existing.with_labels(rule.labels)
+        self.__wildcards = None
+        self.__labels = {}
 
     def __init__(self):
         """
         Initialise a state.
         """
         self.__rules = {}
+        self.__shared_rules = False
+        # Collected from the rules when needed, see `__index_wildcards`
+        self.__wildcards = None
+        self.__leading_wildcards = ()
+        # The labels of each variable looked up, until the rules change
+        self.__labels = {}
         self.__pc = set()
         self.__used = set()
         self.__warnings = []
 
+    def __own_rules(self) -> None:
+        """
+        Copies share their rule table until one of them changes it,
+        so make a private copy of the table before modifying it.
+        The rules themselves are never changed, and stay shared.
+        """
+        if self.__shared_rules:
+            self.__rules = self.__rules.copy()
+            self.__shared_rules = False
+
+    def __index_wildcards(self) -> None:
+        """
+        Collects the rules with wildcards for `get_labels`, grouped by
+        the character they start with. Rules starting with a wildcard
+        may apply to any variable, so they are kept apart.
+        """
+        by_first = {}
+        leading = []
+        for restr, rule in self.__rules.items():
+            if rule.literal is not None:
+                continue
+            if restr[0] == "*":
+                leading.append(rule)
+            else:
+                by_first.setdefault(restr[0], []).append(rule)
+        self.__wildcards = {first: tuple(rules) for first, rules in by_first.items()}
+        self.__leading_wildcards = tuple(leading)
+
     def get_used(self, what=0) -> None:
         """
         Get all used labels, returns:
@@ -59,22 +186,42 @@ class State:
         1: vars (dict of vars and their labels)
         2: labels, vars
         """
-        labels = set()
-        vars = dict()
-        for var in self.__used:
-            l = self.get_labels(var)
-            labels.update(l)
-            vars[var] = l
         match what:
             case 0:
-                return labels
+                return self.get_used_labels()
             case 1:
-                return vars
+                return self.get_used_vars()
             case 2:
-                return labels, vars
+                return self.get_used_both()
             case _:
                 return None
 
+    def get_used_labels(self) -> set:
+        """
+        Get the labels of all used variables
+        """
+        labels = set()
+        for var in self.__used:
+            labels.update(self.get_labels(var))
+        return labels
+
+    def get_used_vars(self) -> dict:
+        """
+        Get all used variables and their labels
+        """
+        return {var: self.get_labels(var) for var in self.__used}
+
+    def get_used_both(self) -> tuple:
+        """
+        Get the labels of all used variables,
+        and all used variables and their labels
+        """
+        vars = self.get_used_vars()
+        labels = set()
+        for l in vars.values():
+            labels.update(l)
+        return labels, vars
+
     def set_used(self, other) -> None:
         """
         Set a variable as used
@@ -82,7 +229,7 @@ class State:
         if type(other) == str:
             self.__used.add(other)
         elif type(other) == State:
-            self.__used.update(other.get_used())
+            self.__used.update(other.get_used_labels())
         else:
             for var in other:
                 self.__used.add(var)
@@ -90,13 +237,19 @@ class State:
     def copy(self, used=True):
         """
         Returns a copy of this state
-        Uses deepcopy to avoid modifying the original state
+        The rules are shared until either state modifies them,
+        PC and used hold strings only, so copying the sets suffices
         In case of a copy, the used labels are not copied
         """
-        state = State()
-        state.__pc = deepcopy(self.__pc)
-        state.__rules = deepcopy(self.__rules)
-        state.__used = deepcopy(self.__used)
+        # Every attribute is set below, so skip initialising the state
+        state = object.__new__(State)
+        state.__pc = self.__pc.copy()
+        state.__rules = self.__rules
+        state.__shared_rules = self.__shared_rules = True
+        state.__wildcards = self.__wildcards
+        state.__leading_wildcards = self.__leading_wildcards
+        state.__labels = self.__labels
+        state.__used = self.__used.copy()
         state.__warnings = self.__warnings
         return state
 
@@ -121,7 +274,7 @@ class State:
     def __str__(self) -> str:
         res = ["State: ", f"\t<PC>: {self.__pc}"]
         for regex, rule in self.__rules.items():
-            res.append(f"\t{regex}: {rule.labels}")
+            res.append(f"\t{regex}: {set(rule.labels)}")
         res.append(f"\tUsed: {self.__used}")
         return "\n".join(res)
 
@@ -161,40 +314,59 @@ class State:
         Example: a: my_label, my_label_2. b: other_label
 
         """
-        rules = list(filter(bool, comment.strip().split(".")))
-        for rule in rules:
-            try:
-                first, second = tuple(re.split(r":", rule))
-                regex = re.findall(r"[a-zA-Z0-9_\*]+", first)[0]
-                labels = list(
-                    filter(bool, (map(lambda x: x.strip(), second.split(","))))
-                )
-                if regex and labels:
-                    labels = list(filter(lambda x: x != "()", labels))
-                    if len(labels) == 0:
-                        self.__rules[regex] = self.__Rule(regex, set())
-                    elif regex not in self.__rules:
-                        self.__rules[regex] = self.__Rule(regex, labels)
-                    else:
-                        self.__rules[regex].add(labels)
-
-            except (ValueError, IndexError) as e:
-                print(e)
-                continue
+        self.__own_rules()
+        self.__wildcards = None
+        self.__labels = {}
+        for regex, labels in _parse_rules(comment):
+            if len(labels) == 0:
+                self.__rules[regex] = self.__Rule(regex, ())
+            elif regex not in self.__rules:
+                self.__rules[regex] = self.__Rule(regex, labels)
+            else:
+                self.__rules[regex] = self.__rules[regex].with_labels(labels)
 
-    def get_labels(self, variable: str) -> set:
+    def get_labels(self, variable: str) -> frozenset:
         """
         Input variable name to check.
-        Returns labels as a set.
+        Returns labels as a frozenset.
         Gets all rules that apply to the variable and returns
         all of the rules' labels.
+        The result is kept until the rules change, and shared
+        with the copies sharing the rules.
 
         variable: The variable to check
         """
-        result = set()
-        for _, rule in self.__rules.items():
+        labels = self.__labels.get(variable)
+        if labels is None:
+            labels = self.__labels[variable] = self.__find_labels(variable)
+        return labels
+
+    def __find_labels(self, variable: str) -> frozenset:
+        """
+        Returns the labels of all rules that apply to the variable,
+        see `get_labels`.
+        """
+        matched = []
+        # A rule without wildcards only applies to the variable it names,
+        # so it is found by name rather than by checking every rule
+        rule = self.__rules.get(variable)
+        if rule is not None and rule.literal is not None:
+            if len(rule.labels) == 0:
+                return _NO_LABELS
+            matched.append(rule.labels)
+        if self.__wildcards is None:
+            self.__index_wildcards()
+        # Only the wildcards starting like the variable, or with a
+        # wildcard, can apply to it
+        candidates = self.__wildcards.get(variable[:1], ())
+        for rule in (*candidates, *self.__leading_wildcards):
             if rule.applies_to(variable):
                 if len(rule.labels) == 0:
-                    return set()
-                result.update(rule.labels)
-        return result
+                    return _NO_LABELS
+                matched.append(rule.labels)
+        if not matched:
+            return _NO_LABELS
+        # The labels of a single rule are frozen, so they can be shared
+        if len(matched) == 1:
+            return matched[0]
+        return frozenset().union(*matched)
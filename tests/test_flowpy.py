@@ -1,5 +1,12 @@
+import ast
+
+import pytest
+
+from flowpy.arguments import MAIN_SCRIPT
 from flowpy.errors import *
+from flowpy.evaluators import Evaluator
 from flowpy.main import FlowPy
+from flowpy.state import State
 
 
 def test_implicit_flow_function():
@@ -174,3 +181,81 @@ for i in range(a, 0, -1):
     assert result[3].var_to.name == "k"
     assert result[3].var_to.labels == set()
     assert result[3].line == 7
+
+
+def test_evaluation_leaves_ast_untouched():
+    """
+    Test that evaluating a tree does not modify it,
+    so evaluating the same tree again reports the same errors.
+    """
+    tree = ast.parse(
+        """
+a = 1
+if a == 1 == b:
+    b = a
+c = 1 if a < b else 2
+"""
+    )
+    dump = ast.dump(tree)
+    rules = State()
+    rules.add_rules("a: high.")
+    counts = []
+    for _ in range(2):
+        state = Evaluator.from_AST(tree, State(), {MAIN_SCRIPT: rules}).evaluate()
+        counts.append(len(state.get_warnings()))
+        assert ast.dump(tree) == dump
+    assert counts[0] == counts[1] == 2
+
+
+def test_method_call_without_pc():
+    """
+    Test that calls of functions that are not plain names
+    are analysed when there is nothing to report.
+    """
+    flowpy = FlowPy(
+        """
+x = []
+x.append(1)
+print(''.join([]))
+(lambda: 1)()
+"""
+    )
+    assert flowpy.run() == []
+
+
+def test_source_strings_naming_no_file():
+    """
+    Test that strings naming no file are analysed as source code,
+    even when they pass through an existing file.
+    """
+    for source in ("x = 1", "README.md/x", "x = 1\n# " + "x" * 4096):
+        flowpy = FlowPy(source)
+        assert flowpy.sources[0].is_file is False
+        assert flowpy.sources[0].source == source
+
+
+def test_source_directory_is_not_code(tmp_path):
+    """
+    Test that a source naming a directory is reported,
+    rather than analysed as source code.
+    """
+    with pytest.raises(IsADirectoryError):
+        FlowPy(str(tmp_path))
+
+
+def test_source_file_line_endings(tmp_path):
+    """
+    Test that the rules of source files are read
+    whatever line endings the files use.
+    """
+    for ending in ("\n", "\r\n", "\r"):
+        path = tmp_path / "source.py"
+        path.write_bytes(
+            ending.join(["# fp a: high.", "# fp b: low", "b = a", ""]).encode()
+        )
+        flowpy = FlowPy(str(path))
+        assert flowpy.sources[0].source == "# fp a: high.\n# fp b: low\nb = a\n"
+        result = flowpy.run()
+        assert len(result) == 1
+        assert type(result[0]) == ExplicitFlowError
+        assert result[0].var_to.labels == {"low"}
@@ -116,3 +116,67 @@ def test_combine():
     state.combine(state2)
     assert state.get_labels("a") == {"label", "label2"}
     assert state2.get_labels("a") == {"label2"}
+
+
+def test_combine_copy():
+    """
+    Tests that combining into a copy leaves the original state,
+    and the combined state, unchanged.
+    """
+    state = State()
+    state.add_rules("a: label.")
+    other = State()
+    other.add_rules("a: label2. b: label3.")
+    copy = state.copy()
+    copy.combine(other)
+    copy.add_rules("b: label4.")
+    assert copy.get_labels("a") == {"label", "label2"}
+    assert copy.get_labels("b") == {"label3", "label4"}
+    assert state.get_labels("a") == {"label"}
+    assert state.get_labels("b") == set()
+    assert other.get_labels("a") == {"label2"}
+    assert other.get_labels("b") == {"label3"}
+
+
+def test_wildcard_affixes():
+    """
+    Test that the prefix and suffix of a wildcard rule may not overlap.
+    """
+    state = State()
+    state.add_rules("ab*ba: label. *a*: label2.")
+    assert state.get_labels("aba") == {"label2"}
+    assert state.get_labels("abba") == {"label", "label2"}
+    assert state.get_labels("abcba") == {"label", "label2"}
+    assert state.get_labels("bcb") == set()
+
+
+def test_wildcards_by_first_character():
+    """
+    Test that wildcard rules apply whether or not they start with a wildcard.
+    """
+    state = State()
+    state.add_rules("a*: label. b*: label2. *c: label3. ")
+    assert state.get_labels("abc") == {"label", "label3"}
+    assert state.get_labels("bc") == {"label2", "label3"}
+    assert state.get_labels("cab") == set()
+    assert state.get_labels("") == set()
+
+
+def test_label_lookups_follow_rule_changes():
+    """
+    Test that labels looked up before the rules change are not reused,
+    neither by the state nor by its copies.
+    """
+    state = State()
+    state.add_rules("a*: label.")
+    assert state.get_labels("a") == {"label"}
+    copy = state.copy()
+    assert copy.get_labels("a") == {"label"}
+    other = State()
+    other.add_rules("a: label2.")
+    copy.combine(other)
+    assert copy.get_labels("a") == {"label", "label2"}
+    assert state.get_labels("a") == {"label"}
+    state.add_rules("a: ().")
+    assert state.get_labels("a") == set()
+    assert copy.get_labels("a") == {"label", "label2"}